@@ -1,10 +1,15 @@
 """Superdense coding."""
 
 # Imports
+import numpy as np
 import qiskit
 
+# Translation table: byte 0 -> '0', byte 1 -> '1'
+_BIT_CHARS = bytes.maketrans(b'\x00\x01', b'01')
+
 def bitstring(bits):
-    return ''.join('1' if b else '0' for b in bits)
+    # Cast to bool in numpy (truthiness, done in C), then map bytes to characters
+    return np.asarray(bits, dtype=bool).view(np.uint8).tobytes().translate(_BIT_CHARS).decode()
 
 
 # Create two quantum and classical registers
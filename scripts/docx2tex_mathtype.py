@@ -4,18 +4,28 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import mmap
+import os
 import re
 import shutil
+import sqlite3
 import subprocess
 import sys
-import tempfile
 import textwrap
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import IO, Iterable
 
-import xml.etree.ElementTree as ET
+# lxml is optional: it parses and walks large documents considerably faster,
+# but the standard library parser works the same way when it is not installed.
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 
 
 @dataclass(frozen=True)
@@ -32,22 +42,40 @@ DOCX_NS = {
     "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
 }
 
+# Clark-notation tags, built once for the document.xml scan.
+W_P = f"{{{DOCX_NS['w']}}}p"
+W_T = f"{{{DOCX_NS['w']}}}t"
+W_OBJECT = f"{{{DOCX_NS['w']}}}object"
+V_IMAGEDATA = f"{{{DOCX_NS['v']}}}imagedata"
+O_OLE = f"{{{DOCX_NS['o']}}}OLEObject"
+R_ID_ATTR = f"{{{DOCX_NS['r']}}}id"
+
 
 def _run(
     args: list[str],
     *,
     cwd: Path | None = None,
     input_text: str | None = None,
+    binary_input: bytes | None = None,
     check: bool = True,
 ) -> subprocess.CompletedProcess[str]:
-    proc = subprocess.run(
+    if input_text is not None:
+        binary_input = input_text.encode("utf-8")
+    raw = subprocess.run(
         args,
         cwd=str(cwd) if cwd else None,
-        input=input_text,
-        text=True,
+        input=binary_input,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
     )
+    # Decode as UTF-8 ourselves rather than using text=True, which picks the
+    # locale encoding (not UTF-8 on many Windows setups) and translates newlines.
+    proc = subprocess.CompletedProcess(
+        raw.args,
+        raw.returncode,
+        raw.stdout.decode("utf-8", errors="replace"),
+        raw.stderr.decode("utf-8", errors="replace"),
+    )
     if check and proc.returncode != 0:
         cmd = " ".join(args)
         raise RuntimeError(
@@ -61,25 +89,59 @@ def _require_executable(name: str) -> None:
         raise RuntimeError(f"Missing required executable: {name}")
 
 
-def _check_runtime_dependencies() -> None:
+# Environment variables that change which ruby runs or where it loads gems from.
+_RUBY_LOAD_ENV = ("RUBYLIB", "GEM_HOME", "GEM_PATH", "RBENV_VERSION", "BUNDLE_GEMFILE")
+
+
+def _ruby_deps_marker() -> Path:
+    return _cache_dir() / "deps_ok.json"
+
+
+def _ruby_deps_key(ruby: str, gem_file: str) -> str:
+    env = ":".join(f"{name}={os.environ.get(name, '')}" for name in _RUBY_LOAD_ENV)
+    return f"{ruby}:{os.path.getmtime(ruby)}:{gem_file}:{os.path.getmtime(gem_file)}:{env}"
+
+
+def _check_runtime_dependencies(*, use_cache: bool = True) -> None:
     _require_executable("pandoc")
     _require_executable("ruby")
-    _run(
+
+    # Loading the gem is the slowest part of start-up, so a successful probe is
+    # remembered until the ruby executable, the gem's main file or the ruby
+    # load-path environment changes.
+    ruby = shutil.which("ruby") or "ruby"
+    marker = _ruby_deps_marker()
+    if use_cache:
+        try:
+            cached = json.loads(marker.read_text(encoding="utf-8"))
+            if cached["key"] == _ruby_deps_key(ruby, cached["gem_file"]):
+                return
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    proc = _run(
         [
             "ruby",
             "-e",
-            "require 'mathtype_to_mathml_plus'; puts 'ok'",
+            "require 'mathtype_to_mathml_plus'; "
+            "puts $LOADED_FEATURES.find { |f| f.end_with?('/mathtype_to_mathml_plus.rb') }",
         ],
         check=True,
     )
+    gem_file = proc.stdout.strip()
+    if use_cache and gem_file:
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.write_text(
+                json.dumps({"gem_file": gem_file, "key": _ruby_deps_key(ruby, gem_file)}),
+                encoding="utf-8",
+            )
+        except OSError:
+            pass
 
 
-def _read_zip_text(z: zipfile.ZipFile, name: str) -> str:
-    return z.read(name).decode("utf-8", errors="replace")
-
-
-def _parse_rels(z: zipfile.ZipFile) -> dict[str, str]:
-    rels_xml = _read_zip_text(z, "word/_rels/document.xml.rels")
+def _parse_rels(rels_xml: bytes) -> dict[str, str]:
+    # Parse the raw bytes: lxml rejects str input that carries an encoding declaration.
     root = ET.fromstring(rels_xml)
     rels: dict[str, str] = {}
     for rel in root:
@@ -90,39 +152,61 @@ def _parse_rels(z: zipfile.ZipFile) -> dict[str, str]:
     return rels
 
 
-def _iter_equation_objects(z: zipfile.ZipFile) -> Iterable[EquationObject]:
-    rels = _parse_rels(z)
-    document_xml = _read_zip_text(z, "word/document.xml")
-    root = ET.fromstring(document_xml)
+def _paragraph_equation_objects(p: ET.Element, rels: dict[str, str]) -> Iterable[EquationObject]:
+    # Most paragraphs hold no equation at all; only join the text when it matters.
+    objects = list(p.iter(W_OBJECT))
+    if not objects:
+        return
 
-    for p in root.iterfind(".//w:p", DOCX_NS):
-        paragraph_text = "".join((t.text or "") for t in p.iterfind(".//w:t", DOCX_NS))
-        has_text = bool(paragraph_text.strip())
+    paragraph_text = "".join((t.text or "") for t in p.iter(W_T))
+    has_text = bool(paragraph_text.strip())
 
-        for obj in p.iterfind(".//w:object", DOCX_NS):
-            imagedata = obj.find(".//v:imagedata", DOCX_NS)
-            ole = obj.find(".//o:OLEObject", DOCX_NS)
-            if imagedata is None or ole is None:
-                continue
+    for obj in objects:
+        imagedata = next(obj.iter(V_IMAGEDATA), None)
+        ole = next(obj.iter(O_OLE), None)
+        if imagedata is None or ole is None:
+            continue
 
-            img_rid = imagedata.attrib.get(f"{{{DOCX_NS['r']}}}id")
-            ole_rid = ole.attrib.get(f"{{{DOCX_NS['r']}}}id")
-            if not img_rid or not ole_rid:
-                continue
+        img_rid = imagedata.attrib.get(R_ID_ATTR)
+        ole_rid = ole.attrib.get(R_ID_ATTR)
+        if not img_rid or not ole_rid:
+            continue
 
-            img_target = rels.get(img_rid)
-            ole_target = rels.get(ole_rid)
-            if not img_target or not ole_target:
-                continue
+        img_target = rels.get(img_rid)
+        ole_target = rels.get(ole_rid)
+        if not img_target or not ole_target:
+            continue
 
-            image_filename = Path(img_target).name
-            ole_filename = Path(ole_target).name
+        # Relationship targets always use "/" separators.
+        image_filename = img_target.rpartition("/")[2]
+        ole_filename = ole_target.rpartition("/")[2]
 
-            yield EquationObject(
-                image_filename=image_filename,
-                ole_filename=ole_filename,
-                inline=has_text,
-            )
+        yield EquationObject(
+            image_filename=image_filename,
+            ole_filename=ole_filename,
+            inline=has_text,
+        )
+
+
+def _iter_equation_objects(
+    document_xml: IO[bytes], rels: dict[str, str]
+) -> Iterable[EquationObject]:
+    # Stream document.xml and drop each paragraph once it has been inspected, so
+    # only the current paragraph (and its ancestors) is ever held in memory.
+    parents: list[ET.Element] = []
+    for event, elem in ET.iterparse(document_xml, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != W_P:
+            continue
+
+        yield from _paragraph_equation_objects(elem, rels)
+
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
 
 
 def _convert_docx_to_tex(
@@ -149,25 +233,134 @@ def _convert_docx_to_tex(
     )
 
 
-def _ole_to_mathml(ole_bin_bytes: bytes) -> str:
-    with tempfile.NamedTemporaryFile(prefix="docx2tex_ole_", suffix=".bin", delete=False) as f:
-        tmp_path = Path(f.name)
-        f.write(ole_bin_bytes)
-    try:
-        ruby = "require 'mathtype_to_mathml_plus'; print MathTypeToMathMLPlus::Converter.new(ARGV[0]).convert"
-        proc = _run(["ruby", "-e", ruby, str(tmp_path)], check=True)
-        return proc.stdout
-    finally:
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
-
+# Reads OLE blobs from stdin, each framed as a "<name>\t<size>\n" header followed
+# by <size> raw bytes, and converts them all in one interpreter so the gem is only
+# loaded once. The converter only accepts a path, so each blob goes through a
+# Ruby-side tempfile. Each result is framed by ---BEGIN <name>--- / ---ERROR
+# <name>--- and ---END--- lines; a failing equation does not abort the batch.
+_RUBY_BATCH_CONVERTER = (
+    "require 'mathtype_to_mathml_plus'; require 'tempfile'; $stdin.binmode; "
+    "while (header = $stdin.gets); name, size = header.chomp.split(\"\\t\"); "
+    "data = $stdin.read(size.to_i); begin; "
+    "mathml = Tempfile.create(['docx2tex_ole_', '.bin']) { |f| "
+    "f.binmode; f.write(data); f.close; MathTypeToMathMLPlus::Converter.new(f.path).convert }; "
+    "puts \"---BEGIN #{name}---\", mathml, '---END---'; "
+    "rescue StandardError => e; "
+    "puts \"---ERROR #{name}---\", \"#{e.class}: #{e.message}\", '---END---'; end; end"
+)
+
+_RUBY_BATCH_BLOCK = re.compile(
+    r"^---(BEGIN|ERROR) (.+?)---\r?\n(.*?)\r?\n---END---\r?$",
+    re.DOTALL | re.MULTILINE,
+)
+
+
+def _oles_to_mathml(ole_blobs: dict[str, bytes]) -> tuple[dict[str, str], dict[str, str]]:
+    """Convert OLE blobs (keyed by name) to MathML with a single Ruby process.
+
+    Returns ``(mathml_by_name, error_by_name)``.
+    """
+    if not ole_blobs:
+        return {}, {}
+
+    payload = b"".join(
+        f"{name}\t{len(data)}\n".encode("utf-8") + data for name, data in ole_blobs.items()
+    )
+    proc = _run(["ruby", "-e", _RUBY_BATCH_CONVERTER], binary_input=payload, check=True)
+
+    mathml_by_name: dict[str, str] = {}
+    error_by_name: dict[str, str] = {}
+    for m in _RUBY_BATCH_BLOCK.finditer(proc.stdout):
+        kind, name, body = m.groups()
+        if kind == "BEGIN":
+            mathml_by_name[name] = body
+        else:
+            error_by_name[name] = body
+    return mathml_by_name, error_by_name
+
+
+# Each Ruby process pays the interpreter and gem start-up once, so only split the
+# work across processes when every chunk still gets a reasonable number of equations.
+_MIN_EQUATIONS_PER_RUBY_PROCESS = 16
+
+
+def _oles_to_mathml_parallel(
+    ole_blobs: dict[str, bytes],
+) -> tuple[dict[str, str], dict[str, str]]:
+    """Like :func:`_oles_to_mathml`, but spreads the blobs over several Ruby processes.
+
+    A chunk whose process fails marks all of its equations as failed.
+    """
+    names = list(ole_blobs)
+    workers = min(
+        os.cpu_count() or 1,
+        -(-len(names) // _MIN_EQUATIONS_PER_RUBY_PROCESS),
+    )
+    if workers <= 1:
+        chunks = [names] if names else []
+    else:
+        chunks = [names[i::workers] for i in range(workers)]
 
-def _mathml_to_latex(mathml: str) -> str:
-    html = f"<html><body>{mathml}</body></html>"
+    def convert_chunk(chunk: list[str]) -> tuple[dict[str, str], dict[str, str]]:
+        try:
+            return _oles_to_mathml({name: ole_blobs[name] for name in chunk})
+        except Exception as e:
+            # The gem could not be loaded after all: forget the cached probe so the
+            # next run reports the missing dependency instead of failing every equation.
+            if "LoadError" in str(e):
+                _ruby_deps_marker().unlink(missing_ok=True)
+            return {}, {name: str(e) for name in chunk}
+
+    mathml_by_name: dict[str, str] = {}
+    error_by_name: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for chunk_mathml, chunk_errors in pool.map(convert_chunk, chunks):
+            mathml_by_name.update(chunk_mathml)
+            error_by_name.update(chunk_errors)
+    return mathml_by_name, error_by_name
+
+
+# A bare alphanumeric word survives pandoc's HTML -> LaTeX conversion untouched
+# (no escaping, no wrapping), so it can separate equations in one batched call.
+_PANDOC_BATCH_SEPARATOR = "DOCXTEXSPLITCD985272F78311"
+
+
+def _mathml_to_latex(mathml_by_name: dict[str, str]) -> tuple[dict[str, str], dict[str, str]]:
+    """Convert MathML snippets (keyed by name) to LaTeX, normally with a single pandoc call.
+
+    If the batch fails, it is retried in halves so a bad snippet only fails itself.
+    Returns ``(latex_by_name, error_by_name)``.
+    """
+    if not mathml_by_name:
+        return {}, {}
+    try:
+        return _mathml_batch_to_latex(mathml_by_name), {}
+    except Exception as e:
+        if len(mathml_by_name) == 1:
+            return {}, {name: str(e) for name in mathml_by_name}
+
+    names = list(mathml_by_name)
+    middle = len(names) // 2
+    latex_by_name: dict[str, str] = {}
+    error_by_name: dict[str, str] = {}
+    for half in (names[:middle], names[middle:]):
+        half_latex, half_errors = _mathml_to_latex({name: mathml_by_name[name] for name in half})
+        latex_by_name.update(half_latex)
+        error_by_name.update(half_errors)
+    return latex_by_name, error_by_name
+
+
+def _mathml_batch_to_latex(mathml_by_name: dict[str, str]) -> dict[str, str]:
+    separator = f"<p>{_PANDOC_BATCH_SEPARATOR}</p>"
+    html = f"<html><body>{separator.join(mathml_by_name.values())}</body></html>"
     proc = _run(["pandoc", "-f", "html", "-t", "latex"], input_text=html, check=True)
-    return proc.stdout.strip()
+
+    chunks = re.split(rf"^{_PANDOC_BATCH_SEPARATOR}\r?$", proc.stdout, flags=re.MULTILINE)
+    if len(chunks) != len(mathml_by_name):
+        raise RuntimeError(
+            f"pandoc returned {len(chunks)} equations, expected {len(mathml_by_name)}"
+        )
+    return {name: chunk.strip() for name, chunk in zip(mathml_by_name, chunks)}
 
 
 def _wrap_math(latex: str, *, inline: bool) -> str:
@@ -182,81 +375,225 @@ def _wrap_math(latex: str, *, inline: bool) -> str:
     return f"\\[{s}\\]"
 
 
+def _cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "docx2tex_mathtype"
+
+
+def _ole_digest(ole_bin_bytes: bytes) -> str:
+    return hashlib.blake2b(ole_bin_bytes, digest_size=16).hexdigest()
+
+
+def _open_latex_cache() -> sqlite3.Connection | None:
+    """Open the on-disk OLE -> LaTeX cache, or return None if it is unusable."""
+    try:
+        cache_dir = _cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(cache_dir / "latex_cache.sqlite3"))
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS ole2tex(hash TEXT PRIMARY KEY, latex TEXT)")
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def _cache_lookup(conn: sqlite3.Connection, digests: Iterable[str]) -> dict[str, str]:
+    found: dict[str, str] = {}
+    try:
+        for digest in digests:
+            row = conn.execute("SELECT latex FROM ole2tex WHERE hash = ?", (digest,)).fetchone()
+            if row is not None:
+                found[digest] = row[0]
+    except sqlite3.Error:
+        pass
+    return found
+
+
+def _cache_store(conn: sqlite3.Connection, latex_by_digest: dict[str, str]) -> None:
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO ole2tex(hash, latex) VALUES (?, ?)",
+                latex_by_digest.items(),
+            )
+    except sqlite3.Error:
+        pass
+
+
+# Matches both:
+#   \pandocbounded{\includegraphics[...]{...}}
+# and:
+#   \includegraphics[...]{...}
+#
+# We replace the whole wrapper (including the trailing brace) when present.
+#
+# The pattern is bytes so it can run directly over the memory-mapped .tex file.
+_INCLUDE_PATTERN = re.compile(
+    rb"(\\pandocbounded\{)?"
+    rb"(\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\})"
+    rb"\}?"
+)
+
+
+def _scan_includes(tex_path: Path) -> list[tuple[int, int, str]]:
+    """Return ``(start, end, image filename)`` byte spans of the images included by the .tex."""
+    with open(tex_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as tex:
+            if tex.find(b"\\includegraphics") == -1:
+                return []
+            includes: list[tuple[int, int, str]] = []
+            for m in _INCLUDE_PATTERN.finditer(tex):
+                img_path = m.group(3).decode("utf-8", errors="replace")
+                includes.append((m.start(), m.end(), img_path.rpartition("/")[2].rpartition("\\")[2]))
+            return includes
+
+
+def _write_patched_tex(tex_path: Path, replacements: list[tuple[int, int, bytes]]) -> None:
+    """Rewrite the .tex with the given ``(start, end, data)`` byte spans replaced.
+
+    The file is memory-mapped and the result streamed to a sibling file that then
+    replaces the original, so the document is never held in memory as a whole.
+    """
+    new_path = tex_path.with_name(tex_path.name + ".new")
+    try:
+        with open(tex_path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as tex, open(new_path, "wb") as out:
+            last_end = 0
+            for start, end, data in replacements:
+                out.write(tex[last_end:start])
+                out.write(data)
+                last_end = end
+            out.write(tex[last_end:])
+    except BaseException:
+        new_path.unlink(missing_ok=True)
+        raise
+    os.replace(new_path, tex_path)
+
+
 def _replace_equation_images_with_latex(
     *,
     input_docx: Path,
     tex_path: Path,
     backup: bool,
     verbose: bool,
+    use_cache: bool = True,
 ) -> dict[str, int]:
+    includes = _scan_includes(tex_path)
+
+    # The docx is only open while its parts are read: every member is read
+    # exactly once (rels up front, the document streamed, the referenced OLE
+    # blobs in one pass) and the zip is closed before any Ruby/pandoc work.
     with zipfile.ZipFile(input_docx) as z:
-        equation_objects = list(_iter_equation_objects(z))
+        rels = _parse_rels(z.read("word/_rels/document.xml.rels"))
+        with z.open("word/document.xml") as document_xml:
+            equation_objects = list(_iter_equation_objects(document_xml, rels))
         img_to_obj: dict[str, EquationObject] = {}
         for obj in equation_objects:
             img_to_obj[obj.image_filename] = obj
 
-        tex_original = tex_path.read_text(encoding="utf-8")
-
-        if backup:
-            backup_path = tex_path.with_suffix(tex_path.suffix + ".bak")
-            if not backup_path.exists():
-                backup_path.write_text(tex_original, encoding="utf-8")
-
-        ole_to_latex_cache: dict[str, str] = {}
-
-        def ole_to_wrapped_latex(obj: EquationObject) -> str:
-            if obj.ole_filename not in ole_to_latex_cache:
-                ole_bytes = z.read(f"word/embeddings/{obj.ole_filename}")
-                mathml = _ole_to_mathml(ole_bytes)
-                latex = _mathml_to_latex(mathml)
-                ole_to_latex_cache[obj.ole_filename] = latex
-            return _wrap_math(ole_to_latex_cache[obj.ole_filename], inline=obj.inline)
-
-        replaced = 0
-        skipped_no_map = 0
-        failed = 0
-
-        # Matches both:
-        #   \pandocbounded{\includegraphics[...]{...}}
-        # and:
-        #   \includegraphics[...]{...}
-        #
-        # We replace the whole wrapper (including the trailing brace) when present.
-        include_pattern = re.compile(
-            r"(\\pandocbounded\{)?"
-            r"(\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\})"
-            r"\}?"
+        if not includes:
+            return {
+                "equation_objects": len(equation_objects),
+                "replaced": 0,
+                "skipped_no_map": 0,
+                "failed": 0,
+            }
+
+        # Only the equations the .tex actually references are converted, all of
+        # them in a single Ruby invocation.
+        used_objs = list(
+            dict.fromkeys(img_to_obj[name] for _, _, name in includes if name in img_to_obj)
         )
+        used_ole_filenames = {obj.ole_filename for obj in used_objs}
 
-        def replacer(m: re.Match[str]) -> str:
-            nonlocal replaced, skipped_no_map, failed
-            img_path = m.group(3)
-            image_filename = Path(img_path).name
-            obj = img_to_obj.get(image_filename)
-            if obj is None:
-                skipped_no_map += 1
-                return m.group(0)
+        ole_blobs: dict[str, bytes] = {}
+        ole_errors: dict[str, str] = {}
+        for ole_filename in sorted(used_ole_filenames):
             try:
-                latex = ole_to_wrapped_latex(obj)
-            except Exception as e:
-                failed += 1
-                if verbose:
-                    sys.stderr.write(
-                        f"[warn] failed converting {obj.ole_filename} (for {image_filename}): {e}\n"
-                    )
-                return m.group(0)
+                ole_blobs[ole_filename] = z.read(f"word/embeddings/{ole_filename}")
+            except KeyError as e:
+                ole_errors[ole_filename] = str(e)
+
+    # Equations are converted per distinct OLE content: identical blobs stored
+    # under different filenames are converted once. Results are also cached on
+    # disk by that hash, so re-runs (and the same equation appearing in other
+    # documents) skip Ruby and pandoc.
+    digest_by_ole = {name: _ole_digest(data) for name, data in ole_blobs.items()}
+    ole_by_digest: dict[str, bytes] = {}
+    for name, data in ole_blobs.items():
+        ole_by_digest.setdefault(digest_by_ole[name], data)
+
+    ole_to_latex_cache: dict[str, str] = {}
+    cache = _open_latex_cache() if use_cache else None
+    if cache is not None:
+        ole_to_latex_cache.update(_cache_lookup(cache, ole_by_digest))
+
+    pending = {
+        digest: data for digest, data in ole_by_digest.items() if digest not in ole_to_latex_cache
+    }
+    mathml_by_digest, digest_errors = _oles_to_mathml_parallel(pending)
+
+    converted, latex_errors = _mathml_to_latex(mathml_by_digest)
+    digest_errors.update(latex_errors)
+    ole_to_latex_cache.update(converted)
+
+    if cache is not None:
+        _cache_store(cache, converted)
+        cache.close()
+
+    for name, digest in digest_by_ole.items():
+        if digest in digest_errors:
+            ole_errors[name] = digest_errors[digest]
+
+    def ole_to_wrapped_latex(obj: EquationObject) -> str:
+        latex = ole_to_latex_cache.get(digest_by_ole.get(obj.ole_filename, ""))
+        if latex is None:
+            raise RuntimeError(ole_errors.get(obj.ole_filename, "no LaTeX produced"))
+        return _wrap_math(latex, inline=obj.inline)
+
+    img_to_latex: dict[str, str] = {}
+    for obj in used_objs:
+        try:
+            img_to_latex[obj.image_filename] = ole_to_wrapped_latex(obj)
+        except Exception as e:
+            if verbose:
+                sys.stderr.write(
+                    f"[warn] failed converting {obj.ole_filename} (for {obj.image_filename}): {e}\n"
+                )
+
+    replaced = 0
+    skipped_no_map = 0
+    failed = 0
+
+    replacements: list[tuple[int, int, bytes]] = []
+    for start, end, image_filename in includes:
+        latex = img_to_latex.get(image_filename)
+        if latex is not None:
             replaced += 1
-            return latex
-
-        tex_new = include_pattern.sub(replacer, tex_original)
-        tex_path.write_text(tex_new, encoding="utf-8")
+            replacements.append((start, end, latex.encode("utf-8")))
+        elif image_filename in img_to_obj:
+            failed += 1
+        else:
+            skipped_no_map += 1
+
+    # Leave the .tex (and its backup) untouched when nothing changes, so build
+    # tools watching it do not see a spurious modification.
+    if replacements:
+        if backup:
+            backup_path = tex_path.with_suffix(tex_path.suffix + ".bak")
+            if not backup_path.exists():
+                shutil.copyfile(tex_path, backup_path)
+        _write_patched_tex(tex_path, replacements)
 
-        return {
-            "equation_objects": len(equation_objects),
-            "replaced": replaced,
-            "skipped_no_map": skipped_no_map,
-            "failed": failed,
-        }
+    return {
+        "equation_objects": len(equation_objects),
+        "replaced": replaced,
+        "skipped_no_map": skipped_no_map,
+        "failed": failed,
+    }
 
 
 def _default_output_name(input_docx: Path) -> str:
@@ -295,6 +632,12 @@ def main(argv: list[str]) -> int:
         action="store_true",
         help="Do not write a .bak copy of the generated .tex before patching equations",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk equation and dependency-check cache "
+        "(~/.cache/docx2tex_mathtype)",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -315,7 +658,7 @@ def main(argv: list[str]) -> int:
         return 2
 
     try:
-        _check_runtime_dependencies()
+        _check_runtime_dependencies(use_cache=not args.no_cache)
     except Exception as e:
         sys.stderr.write(
             "Missing dependencies.\n"
@@ -336,6 +679,7 @@ def main(argv: list[str]) -> int:
         tex_path=out_dir / tex_name,
         backup=not args.no_backup,
         verbose=args.verbose,
+        use_cache=not args.no_cache,
     )
 
     sys.stdout.write(